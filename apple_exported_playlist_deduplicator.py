@@ -4,8 +4,9 @@ from pathlib import Path
 
 def parse_itunes_txt(file_path):
     """Parse iTunes playlist export and extract tracks"""
+    # Read once; universal newlines have already turned '\r' and '\r\n' into '\n'
     with open(file_path, 'r', encoding='utf-16') as f:
-        lines = f.readlines()
+        lines = f.read().split('\n')
     
     if len(lines) < 2:
         return []
@@ -19,8 +20,15 @@ def parse_itunes_txt(file_path):
     location_idx = header.index('Location')
     time_idx = header.index('Time')
     
+    # Only split off the fields we read; trailing columns stay in one remainder string
+    max_split = max(name_idx, artist_idx, location_idx, time_idx) + 1
+    
     for line in lines[1:]:
-        fields = line.strip().split('\t')
+        # Cheap substring check rejects non-AIFF rows before any splitting
+        if '.aif' not in line:
+            continue
+        
+        fields = line.strip().split('\t', max_split)
         if len(fields) > location_idx and fields[location_idx].endswith('.aif'):
             tracks.append({
                 'artist': fields[artist_idx],
@@ -37,7 +45,7 @@ def dedupe_and_shuffle(tracks):
     unique = []
     
     for track in tracks:
-        key = f"{track['artist']} - {track['name']}".lower()
+        key = (track['artist'].casefold(), track['name'].casefold())
         if key not in seen:
             seen.add(key)
             unique.append(track)
@@ -15,10 +15,95 @@ Features:
 Author: rekidderjr
 """
 
+import os
 import random
-import xml.etree.ElementTree as ET  # nosec B405 - parsing trusted iTunes library files
-from collections import defaultdict
+import re
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import unquote
+
+try:
+    from lxml import etree as ET  # nosec B410 - parsing trusted iTunes library files
+except ImportError:
+    import xml.etree.ElementTree as ET  # nosec B405 - parsing trusted iTunes library files
+
+
+def _str_value(element):
+    """Return the text of a plist value element"""
+    return element.text or ""
+
+
+def _interned_str_value(element):
+    """Return the text of a plist value element, shared with identical values"""
+    # Artists, albums and genres repeat across many tracks; interning keeps one copy of each
+    return sys.intern(element.text or "")
+
+
+def _int_value(element):
+    """Return the integer value of a plist value element"""
+    return int(element.text) if element.text else 0
+
+
+def _file_exists(local_path, dir_cache):
+    """Check whether a file exists using a cached listing of its parent directory"""
+    directory, name = os.path.split(local_path)
+
+    if directory not in dir_cache:
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                dir_cache[directory] = {entry.name for entry in entries}
+        except FileNotFoundError:
+            # Nothing inside a missing directory can exist
+            dir_cache[directory] = None
+        except OSError:
+            dir_cache[directory] = set()
+
+    names = dir_cache[directory]
+    if names is None:
+        return False
+    # Confirm misses with stat() so case- or normalization-insensitive filesystems still match
+    return name in names or Path(local_path).exists()
+
+
+# Characters other than letters, digits, spaces, hyphens and underscores are dropped from file names
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w \-]+")
+
+
+# Library.xml track key -> (Track attribute, value converter)
+_FIELD_MAP = {
+    "Name": ("name", _str_value),
+    "Artist": ("artist", _interned_str_value),
+    "Album": ("album", _interned_str_value),
+    "Genre": ("genre", _interned_str_value),
+    "BPM": ("bpm", _int_value),
+    "Total Time": ("duration", _int_value),
+    "Location": ("location", _str_value),
+}
+
+
+class Track:
+    """
+    A single library track holding the metadata used for sorting and playlists.
+
+    Tracks are created in large numbers, so attributes live in __slots__
+    instead of a per-instance dictionary.
+    """
+
+    __slots__ = ("name", "artist", "album", "genre", "bpm", "duration", "location")
+
+    def __init__(self, name="", artist="", album="", genre="", bpm=0, duration=0, location=""):
+        self.name = name
+        self.artist = artist
+        self.album = album
+        self.genre = genre
+        self.bpm = bpm
+        self.duration = duration
+        self.location = location
+
+    def __repr__(self):
+        return f"Track(artist={self.artist!r}, name={self.name!r})"
 
 
 class MusicSorter:
@@ -34,7 +119,7 @@ class MusicSorter:
 
     Attributes:
         library_xml_path (str): Path to the iTunes Library.xml file
-        tracks (list): List of parsed track dictionaries
+        tracks (list): List of parsed Track objects
     """
 
     def __init__(self, library_xml_path):
@@ -47,61 +132,76 @@ class MusicSorter:
         self.library_xml_path = library_xml_path
         self.tracks = []
 
+        # Groupings shared by create_playlists and generate_report; reset by parse_library
+        self._bpm_sorted = None
+        self._genre_sorted = None
+
     def parse_library(self):
         """Parse iTunes Library.xml and extract track data"""
-        tree = ET.parse(self.library_xml_path)  # nosec B314 - parsing trusted iTunes library files
-        root = tree.getroot()
+        self._bpm_sorted = None
+        self._genre_sorted = None
 
-        # Find the tracks dictionary
+        # Stream the plist so only one track <dict> is held in memory at a time:
+        # <plist> (depth 1) > <dict> (2) > <key>Tracks</key> + <dict> (3) > track <dict> (4)
         tracks_dict = None
-        dict_children = list(root.find("dict"))
-        for i, child in enumerate(dict_children):
-            if child.tag == "key" and child.text == "Tracks":
-                if i + 1 < len(dict_children):
-                    tracks_dict = dict_children[i + 1]
-                break
+        tracks_key_seen = False
+        depth = 0
+
+        with open(self.library_xml_path, "rb") as source:
+            for event, elem in ET.iterparse(source, events=("start", "end")):  # nosec B314 - trusted iTunes library files
+                if event == "start":
+                    depth += 1
+                    if depth == 3 and tracks_key_seen and tracks_dict is None:
+                        tracks_dict = elem
+                    continue
+
+                if tracks_dict is None:
+                    if depth == 3 and elem.tag == "key" and elem.text == "Tracks":
+                        tracks_key_seen = True
+                elif elem is tracks_dict:
+                    # Everything after the tracks dictionary (playlists) is not needed
+                    break
+                elif depth == 4 and elem.tag == "dict":
+                    track_info = self._parse_track_data(elem)
+                    if track_info:
+                        self.tracks.append(track_info)
+
+                    # Drop the parsed track and everything before it so memory stays flat.
+                    # The element just closed stays attached: lxml's parser still points at it.
+                    elem.clear()
+                    del tracks_dict[:-1]
+
+                depth -= 1
 
         if tracks_dict is None:
             print("No tracks found in library")
             return
 
-        # Parse each track
-        for i in range(0, len(tracks_dict), 2):
-            track_data = tracks_dict[i + 1]
-
-            track_info = self._parse_track_data(track_data)
-            if track_info:
-                self.tracks.append(track_info)
-
         print(f"Parsed {len(self.tracks)} tracks")
 
     def _parse_track_data(self, track_element):
         """Extract relevant data from a track element"""
-        track = {}
+        fields = {}
 
-        for i in range(0, len(track_element), 2):
-            if i + 1 >= len(track_element):
-                break
-
-            key = track_element[i].text
-            value_element = track_element[i + 1]
-
-            if key in ["Name", "Artist", "Album", "Genre"]:
-                track[key.lower()] = value_element.text or ""
-            elif key == "BPM":
-                track["bpm"] = int(value_element.text) if value_element.text else 0
-            elif key == "Total Time":
-                track["duration"] = int(value_element.text) if value_element.text else 0
-            elif key == "Location":
-                track["location"] = value_element.text or ""
+        # Walk the <key>/<value> children pairwise; an unpaired trailing key is ignored
+        children = iter(track_element)
+        for key_element, value_element in zip(children, children):
+            spec = _FIELD_MAP.get(key_element.text)
+            if spec:
+                field, convert = spec
+                fields[field] = convert(value_element)
 
         # Only include tracks with basic info
-        if track.get("name") and track.get("artist"):
-            return track
+        if fields.get("name") and fields.get("artist"):
+            return Track(**fields)
         return None
 
     def sort_by_bpm(self, bpm_ranges=None):
-        """Sort tracks by BPM ranges"""
+        """Sort tracks by BPM ranges (the default-range result is cached until the next parse)"""
+        use_cache = bpm_ranges is None
+        if use_cache and self._bpm_sorted is not None:
+            return self._bpm_sorted
+
         if bpm_ranges is None:
             bpm_ranges = [
                 (0, 80, "Slow (0-80 BPM)"),
@@ -116,95 +216,141 @@ class MusicSorter:
         bpm_sorted = defaultdict(list)
         no_bpm = []
 
+        # Resolve each distinct BPM value to its range label only once; a library
+        # holds a few hundred distinct BPMs, so the range scan leaves the per-track loop
+        range_labels = {}
+
         for track in self.tracks:
-            bpm = track.get("bpm", 0)
+            bpm = track.bpm
             if bpm == 0:
                 no_bpm.append(track)
                 continue
 
-            for min_bpm, max_bpm, label in bpm_ranges:
-                if min_bpm <= bpm <= max_bpm:
-                    bpm_sorted[label].append(track)
-                    break
+            if bpm not in range_labels:
+                range_labels[bpm] = next((label for min_bpm, max_bpm, label in bpm_ranges if min_bpm <= bpm <= max_bpm), None)
+
+            label = range_labels[bpm]
+            if label is not None:
+                bpm_sorted[label].append(track)
 
         if no_bpm:
             bpm_sorted["No BPM Data"].extend(no_bpm)
 
-        return dict(bpm_sorted)
+        bpm_sorted = dict(bpm_sorted)
+        if use_cache:
+            self._bpm_sorted = bpm_sorted
+        return bpm_sorted
 
     def sort_by_genre(self):
-        """Sort tracks by genre"""
+        """Sort tracks by genre (cached until the next parse)"""
+        if self._genre_sorted is not None:
+            return self._genre_sorted
+
         genre_sorted = defaultdict(list)
 
         for track in self.tracks:
-            genre = track.get("genre", "Unknown").strip()
+            genre = track.genre.strip()
             if not genre:
                 genre = "Unknown"
             genre_sorted[genre].append(track)
 
-        return dict(genre_sorted)
+        self._genre_sorted = dict(genre_sorted)
+        return self._genre_sorted
 
-    def create_playlists(self, output_dir="playlists"):
+    def create_playlists(self, output_dir="playlists", max_workers=8):
         """Create playlist files sorted by BPM and genre"""
         Path(output_dir).mkdir(exist_ok=True)
 
+        # Playlist file -> (tracks, title); a later playlist with the same file name replaces an earlier one
+        playlists = {}
+
         # BPM playlists
         bpm_sorted = self.sort_by_bpm()
         for bpm_range, tracks in bpm_sorted.items():
             if tracks:
-                self._write_playlist(
-                    tracks, f"{output_dir}/BPM_{bpm_range.replace(' ', '_').replace('(', '').replace(')', '')}.m3u", bpm_range
-                )
+                filename = f"{output_dir}/BPM_{bpm_range.replace(' ', '_').replace('(', '').replace(')', '')}.m3u"
+                playlists[filename] = (tracks, bpm_range)
 
         # Genre playlists
         genre_sorted = self.sort_by_genre()
         for genre, tracks in genre_sorted.items():
             if len(tracks) >= 5:  # Only create playlist if 5+ tracks
-                safe_genre = "".join(c for c in genre if c.isalnum() or c in (" ", "-", "_")).strip()
-                self._write_playlist(tracks, f"{output_dir}/Genre_{safe_genre}.m3u", f"Genre: {genre}")
+                safe_genre = _UNSAFE_FILENAME_CHARS.sub("", genre).strip()
+                playlists[f"{output_dir}/Genre_{safe_genre}.m3u"] = (tracks, f"Genre: {genre}")
 
-        # Remove duplicates from all playlists
-        self._cleanup_duplicates(output_dir)
+        # Directory listings shared by all playlists, since every track appears in several
+        dir_cache = {}
 
-        # Random sort playlists to avoid grouping
-        self._random_sort_playlists(output_dir)
+        # Each playlist goes to its own file, so the file I/O can overlap across threads
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._write_playlist, tracks, filename, title, dir_cache)
+                for filename, (tracks, title) in playlists.items()
+            ]
+            # Report in creation order so output from different threads does not interleave
+            for filename, future in zip(playlists, futures):
+                tracks_written, tracks_skipped = future.result()
+                self._print_playlist_summary(filename, tracks_written, tracks_skipped)
 
-    def _write_playlist(self, tracks, filename, title):
-        """Write tracks to M3U playlist file"""
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("#EXTM3U\n")
-            f.write(f"#PLAYLIST:{title}\n")
+    def _write_playlist(self, tracks, filename, title, dir_cache=None):
+        """Write tracks to M3U playlist file without duplicates and in random order
 
-            tracks_written = 0
-            tracks_skipped = 0
+        Returns:
+            tuple: Number of tracks written with a path and number skipped
+        """
+        if dir_cache is None:
+            dir_cache = {}
+
+        seen_tracks = set()
+        track_entries = []
+        tracks_written = 0
+        tracks_skipped = 0
+
+        # Entries are shuffled before writing, so tracks are taken in their given order
+        for track in tracks:
+            track_title = f"{track.artist} - {track.name}"
+            if track_title in seen_tracks:
+                # Skip duplicate track
+                continue
+            seen_tracks.add(track_title)
 
-            for track in sorted(tracks, key=lambda x: (x.get("artist", ""), x.get("name", ""))):
-                duration = track.get("duration", 0) // 1000  # Convert to seconds
-                f.write(f"#EXTINF:{duration},{track.get('artist', '')} - {track.get('name', '')}\n")
+            duration = track.duration // 1000  # Convert to seconds
+            extinf_line = f"#EXTINF:{duration},{track_title}\n"
 
-                location = track.get("location", "")
-                if location.startswith("file://"):
-                    # Convert file URL to local path
-                    from urllib.parse import unquote
-
-                    local_path = unquote(location[7:])  # Remove 'file://'
-
-                    # Check if file exists
-                    if Path(local_path).exists():
-                        f.write(f"{local_path}\n")
-                        tracks_written += 1
-                    else:
-                        f.write(f"# MISSING: {local_path}\n")
-                        tracks_skipped += 1
-                elif location:
-                    # Handle other location formats
-                    f.write(f"{location}\n")
+            location = track.location
+            if location.startswith("file://"):
+                # Convert file URL to local path
+                local_path = unquote(location[7:])  # Remove 'file://'
+
+                # Check if file exists
+                if _file_exists(local_path, dir_cache):
+                    path_line = f"{local_path}\n"
                     tracks_written += 1
                 else:
-                    # No location available
-                    f.write(f"# NO LOCATION: {track.get('artist', '')} - {track.get('name', '')}\n")
+                    path_line = f"# MISSING: {local_path}\n"
                     tracks_skipped += 1
+            elif location:
+                # Handle other location formats
+                path_line = f"{location}\n"
+                tracks_written += 1
+            else:
+                # No location available
+                path_line = f"# NO LOCATION: {track_title}\n"
+                tracks_skipped += 1
+
+            track_entries.append(extinf_line + path_line)
 
+        # Randomly shuffle track entries to avoid artist/album grouping
+        random.shuffle(track_entries)
+
+        # Write the whole playlist with a single call
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(f"#EXTM3U\n#PLAYLIST:{title}\n" + "".join(track_entries))
+
+        return tracks_written, tracks_skipped
+
+    def _print_playlist_summary(self, filename, tracks_written, tracks_skipped):
+        """Print how many tracks of a written playlist have usable paths"""
         print(f"Created playlist: {filename}")
         print(f"  - {tracks_written} tracks with valid paths")
         print(f"  - {tracks_skipped} tracks skipped (missing/invalid paths)")
@@ -216,82 +362,6 @@ class MusicSorter:
             print(f"     2. Music files have been moved or deleted")
             print(f"     3. Library.xml is from a different computer")
 
-    def _cleanup_duplicates(self, output_dir):
-        """Remove duplicate tracks from all .m3u files in the output directory"""
-        playlist_files = Path(output_dir).glob("*.m3u")
-
-        for playlist_file in playlist_files:
-            seen_tracks = set()
-            cleaned_lines = []
-
-            with open(playlist_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-
-                if line.startswith("#EXTINF:"):
-                    # Extract track title from EXTINF line
-                    if "," in line:
-                        track_title = line.split(",", 1)[1]
-
-                        if track_title not in seen_tracks:
-                            seen_tracks.add(track_title)
-                            cleaned_lines.append(lines[i])
-                            # Add the next line (file path) if it exists
-                            if i + 1 < len(lines):
-                                cleaned_lines.append(lines[i + 1])
-                            i += 2
-                        else:
-                            # Skip duplicate track and its path
-                            i += 2
-                    else:
-                        cleaned_lines.append(lines[i])
-                        i += 1
-                else:
-                    cleaned_lines.append(lines[i])
-                    i += 1
-
-            # Write cleaned playlist back to file
-            with open(playlist_file, "w", encoding="utf-8") as f:
-                f.writelines(cleaned_lines)
-
-    def _random_sort_playlists(self, output_dir):
-        """Randomly sort tracks in all .m3u files to avoid artist/album grouping"""
-        playlist_files = Path(output_dir).glob("*.m3u")
-
-        for playlist_file in playlist_files:
-            with open(playlist_file, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-
-            # Separate header lines from track entries
-            header_lines = []
-            track_entries = []
-
-            i = 0
-            while i < len(lines) and not lines[i].strip().startswith("#EXTINF:"):
-                header_lines.append(lines[i])
-                i += 1
-
-            # Collect track entries (EXTINF + path pairs)
-            while i < len(lines):
-                if lines[i].strip().startswith("#EXTINF:") and i + 1 < len(lines):
-                    track_entries.append((lines[i], lines[i + 1]))
-                    i += 2
-                else:
-                    i += 1
-
-            # Randomly shuffle track entries
-            random.shuffle(track_entries)
-
-            # Write back to file
-            with open(playlist_file, "w", encoding="utf-8") as f:
-                f.writelines(header_lines)
-                for extinf_line, path_line in track_entries:
-                    f.write(extinf_line)
-                    f.write(path_line)
-
     def analyze_library_data(self):
         """Analyze the iTunes library data to help debug playlist issues"""
         if not self.tracks:
@@ -299,32 +369,38 @@ class MusicSorter:
             return
 
         total_tracks = len(self.tracks)
-        tracks_with_location = sum(1 for track in self.tracks if track.get("location"))
-        tracks_with_file_urls = sum(1 for track in self.tracks if track.get("location", "").startswith("file://"))
+        tracks_with_location = 0
+        tracks_with_file_urls = 0
         tracks_with_valid_paths = 0
 
+        # Count location kinds in a single pass over the library
+        for track in self.tracks:
+            location = track.location
+            if location:
+                tracks_with_location += 1
+                if location.startswith("file://"):
+                    tracks_with_file_urls += 1
+
         print(f"\n=== LIBRARY DATA ANALYSIS ===")
         print(f"Total tracks: {total_tracks}")
         print(f"Tracks with location data: {tracks_with_location}")
         print(f"Tracks with file:// URLs: {tracks_with_file_urls}")
 
         # Check first few tracks with locations
-        sample_tracks = [t for t in self.tracks[:10] if t.get("location")]
+        sample_tracks = [t for t in self.tracks[:10] if t.location]
         if sample_tracks:
             print(f"\nSample locations (first {len(sample_tracks)} tracks):")
             for i, track in enumerate(sample_tracks, 1):
-                location = track.get("location", "")
+                location = track.location
                 if location.startswith("file://"):
-                    from urllib.parse import unquote
-
                     local_path = unquote(location[7:])
                     exists = Path(local_path).exists()
                     tracks_with_valid_paths += 1 if exists else 0
-                    print(f"  {i}. {track.get('artist', 'Unknown')} - {track.get('name', 'Unknown')}")
+                    print(f"  {i}. {track.artist} - {track.name}")
                     print(f"     Path: {local_path}")
                     print(f"     Exists: {'✅' if exists else '❌'}")
                 else:
-                    print(f"  {i}. {track.get('artist', 'Unknown')} - {track.get('name', 'Unknown')}")
+                    print(f"  {i}. {track.artist} - {track.name}")
                     print(f"     Location: {location}")
 
         if tracks_with_file_urls == 0:
@@ -355,18 +431,29 @@ class MusicSorter:
             print(f"{bpm_range}: {len(tracks)} tracks")
 
         print("\n--- Top Genres ---")
-        sorted_genres = sorted(genre_sorted.items(), key=lambda x: len(x[1]), reverse=True)
-        for genre, tracks in sorted_genres[:10]:
-            print(f"{genre}: {len(tracks)} tracks")
-
-        # BPM statistics
-        bpm_tracks = [t for t in self.tracks if t.get("bpm", 0) > 0]
-        if bpm_tracks:
-            bpms = [t["bpm"] for t in bpm_tracks]
+        genre_counts = Counter({genre: len(tracks) for genre, tracks in genre_sorted.items()})
+        for genre, count in genre_counts.most_common(10):
+            print(f"{genre}: {count} tracks")
+
+        # BPM statistics, accumulated in a single pass
+        bpm_count = 0
+        bpm_total = 0
+        bpm_min = bpm_max = None
+        for track in self.tracks:
+            bpm = track.bpm
+            if bpm > 0:
+                bpm_count += 1
+                bpm_total += bpm
+                if bpm_min is None or bpm < bpm_min:
+                    bpm_min = bpm
+                if bpm_max is None or bpm > bpm_max:
+                    bpm_max = bpm
+
+        if bpm_count:
             print("\n--- BPM Statistics ---")
-            print(f"Tracks with BPM data: {len(bpm_tracks)}")
-            print(f"Average BPM: {sum(bpms) / len(bpms):.1f}")
-            print(f"BPM range: {min(bpms)} - {max(bpms)}")
+            print(f"Tracks with BPM data: {bpm_count}")
+            print(f"Average BPM: {bpm_total / bpm_count:.1f}")
+            print(f"BPM range: {bpm_min} - {bpm_max}")
 
 
 def main():
@@ -14,6 +14,7 @@ Author: rekidderjr
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 from typing import Any, Dict, List, Optional, Union
 
 # Configure logging
@@ -108,8 +109,6 @@ class PlaylistCreator:
         Returns:
             ISO formatted timestamp string
         """
-        from datetime import datetime
-
         return datetime.now().isoformat()
 
     def validate_input(self, value: Any, expected_type: type) -> bool:
@@ -0,0 +1,42 @@
+"""
+Shared fixtures for the test suite.
+
+PlaylistCreator instances and deterministic inputs are shared per session.
+process_data does not modify the instance, so only tests that patch attributes
+need a fresh copy.
+
+Author: rekidderjr
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Dict
+
+import pytest
+
+from apple_music_playlist_creator.main import PlaylistCreator
+
+
+@pytest.fixture(scope="session")
+def default_instance() -> PlaylistCreator:
+    """Session-wide PlaylistCreator with the default configuration."""
+    return PlaylistCreator()
+
+
+@pytest.fixture(scope="session")
+def debug_instance() -> PlaylistCreator:
+    """Session-wide PlaylistCreator with a debug configuration."""
+    return PlaylistCreator({"debug": True, "timeout": 30})
+
+
+@pytest.fixture
+def fresh_instance(default_instance: PlaylistCreator) -> PlaylistCreator:
+    """Fixture providing a shallow copy of the default instance for tests that modify it."""
+    return copy.copy(default_instance)
+
+
+@pytest.fixture(scope="session")
+def large_payload() -> Dict[str, str]:
+    """Session-wide 1000-entry dictionary for large-input tests; treat as read-only."""
+    return {f"key_{i}": f"value_{i}" for i in range(1000)}
@@ -0,0 +1,372 @@
+"""
+Tests for the music sorter.
+
+Library.xml parsing tests run against both parser backends: lxml when it is
+installed and the standard library ElementTree fallback.
+
+Author: rekidderjr
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+import music_sorter
+
+_PLIST_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<!DOCTYPE plist PUBLIC "-//Apple//DTD PLIST 1.0//EN" "http://www.apple.com/DTDs/PropertyList-1.0.dtd">\n'
+    '<plist version="1.0">\n'
+    "<dict>\n"
+    "\t<key>Major Version</key><integer>1</integer>\n"
+)
+
+_PLIST_FOOTER = "</dict>\n</plist>\n"
+
+_TRACKS_SECTION = """\
+\t<key>Tracks</key>
+\t<dict>
+\t\t<key>101</key>
+\t\t<dict>
+\t\t\t<key>Track ID</key><integer>101</integer>
+\t\t\t<key>Name</key><string>First Song</string>
+\t\t\t<key>Artist</key><string>Some Artist</string>
+\t\t\t<key>Album</key><string>Some Album</string>
+\t\t\t<key>Genre</key><string>Rock</string>
+\t\t\t<key>BPM</key><integer>128</integer>
+\t\t\t<key>Total Time</key><integer>215000</integer>
+\t\t\t<key>Location</key><string>file:///Music/First%20Song.aif</string>
+\t\t</dict>
+\t\t<key>102</key>
+\t\t<dict>
+\t\t\t<key>Track ID</key><integer>102</integer>
+\t\t\t<key>Name</key><string>No Artist</string>
+\t\t</dict>
+\t\t<key>103</key>
+\t\t<dict>
+\t\t\t<key>Track ID</key><integer>103</integer>
+\t\t\t<key>Artist</key><string>Some Artist</string>
+\t\t</dict>
+\t\t<key>104</key>
+\t\t<dict>
+\t\t\t<key>Name</key><string>Second Song</string>
+\t\t\t<key>Artist</key><string>Some Artist</string>
+\t\t\t<key>Genre</key>
+\t\t</dict>
+\t</dict>
+"""
+
+# Playlist entries carry Name and Artist keys so they would be picked up as tracks if parsed
+_PLAYLISTS_SECTION = """\
+\t<key>Playlists</key>
+\t<array>
+\t\t<dict>
+\t\t\t<key>Name</key><string>Library</string>
+\t\t\t<key>Artist</key><string>Not A Track</string>
+\t\t</dict>
+\t</array>
+"""
+
+
+@pytest.fixture(params=["lxml", "stdlib"])
+def sorter_module(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> Iterator[ModuleType]:
+    """Fixture providing the music_sorter module loaded with one parser backend."""
+    if request.param == "lxml":
+        pytest.importorskip("lxml")
+    else:
+        # A None entry makes "from lxml import etree" raise ImportError
+        monkeypatch.setitem(sys.modules, "lxml", None)
+
+    yield importlib.reload(music_sorter)
+
+    monkeypatch.undo()
+    importlib.reload(music_sorter)
+
+
+def _write_library(tmp_path: Path, body: str) -> str:
+    """Write a Library.xml with the given top-level entries and return its path."""
+    library = tmp_path / "Library.xml"
+    library.write_text(_PLIST_HEADER + body + _PLIST_FOOTER, encoding="utf-8")
+    return str(library)
+
+
+def _read_playlist(path: Path) -> Tuple[List[str], Dict[str, str]]:
+    """Return a playlist's header lines and its EXTINF line -> path line pairs."""
+    lines = path.read_text(encoding="utf-8").splitlines()
+    entries = lines[2:]
+    assert len(entries) % 2 == 0
+    return lines[:2], dict(zip(entries[::2], entries[1::2]))
+
+
+class TestParseLibrary:
+    """Test suite for MusicSorter.parse_library."""
+
+    def test_backend_selection(self, sorter_module: ModuleType, request: pytest.FixtureRequest) -> None:
+        """Test the module picks the expected parser backend."""
+        backend = request.node.callspec.params["sorter_module"]
+        expected = {"lxml": "lxml.etree", "stdlib": "xml.etree.ElementTree"}[backend]
+        assert sorter_module.ET.__name__ == expected
+
+    def test_parse_tracks(self, sorter_module: ModuleType, tmp_path: Path) -> None:
+        """Test tracks are parsed, incomplete tracks dropped and playlists ignored."""
+        sorter = sorter_module.MusicSorter(_write_library(tmp_path, _TRACKS_SECTION + _PLAYLISTS_SECTION))
+
+        sorter.parse_library()
+
+        assert [(track.artist, track.name) for track in sorter.tracks] == [
+            ("Some Artist", "First Song"),
+            ("Some Artist", "Second Song"),
+        ]
+
+        first = sorter.tracks[0]
+        assert first.album == "Some Album"
+        assert first.genre == "Rock"
+        assert first.bpm == 128
+        assert first.duration == 215000
+        assert first.location == "file:///Music/First%20Song.aif"
+
+    def test_unpaired_trailing_key(self, sorter_module: ModuleType, tmp_path: Path) -> None:
+        """Test a trailing key without a value leaves the field at its default."""
+        sorter = sorter_module.MusicSorter(_write_library(tmp_path, _TRACKS_SECTION))
+
+        sorter.parse_library()
+
+        second = sorter.tracks[1]
+        assert second.name == "Second Song"
+        assert second.genre == ""
+
+    def test_many_tracks(self, sorter_module: ModuleType, tmp_path: Path) -> None:
+        """Test every track survives trimming of already-parsed elements."""
+        entries = "".join(
+            f"<key>{i}</key><dict><key>Name</key><string>Song {i}</string>"
+            f"<key>Artist</key><string>Artist {i % 7}</string><key>BPM</key><integer>{i}</integer></dict>"
+            for i in range(500)
+        )
+        sorter = sorter_module.MusicSorter(_write_library(tmp_path, f"<key>Tracks</key><dict>{entries}</dict>"))
+
+        sorter.parse_library()
+
+        assert [track.name for track in sorter.tracks] == [f"Song {i}" for i in range(500)]
+        assert [track.bpm for track in sorter.tracks] == list(range(500))
+
+    def test_no_tracks_key(self, sorter_module: ModuleType, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test a library without a Tracks key reports it and parses nothing."""
+        sorter = sorter_module.MusicSorter(_write_library(tmp_path, _PLAYLISTS_SECTION))
+
+        sorter.parse_library()
+
+        assert sorter.tracks == []
+        assert "No tracks found in library" in capsys.readouterr().out
+
+
+class TestFileExists:
+    """Test suite for the cached _file_exists helper."""
+
+    def test_existing_file(self, tmp_path: Path) -> None:
+        """Test a file in the directory listing is found."""
+        song = tmp_path / "My Song.aif"
+        song.touch()
+
+        assert music_sorter._file_exists(str(song), {})
+
+    def test_percent_encoded_location(self, tmp_path: Path) -> None:
+        """Test a file:// location with an encoded space resolves to the file on disk."""
+        song = tmp_path / "My Song.aif"
+        song.touch()
+        track = music_sorter.Track(name="Song", artist="Artist", location=song.as_uri())
+        assert "%20" in track.location
+
+        counts = music_sorter.MusicSorter("unused")._write_playlist([track], str(tmp_path / "out.m3u"), "Test", {})
+
+        assert counts == (1, 0)
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        """Test a name absent from an existing directory is reported missing."""
+        (tmp_path / "other.aif").touch()
+        dir_cache: Dict[str, Any] = {}
+
+        assert not music_sorter._file_exists(str(tmp_path / "missing.aif"), dir_cache)
+        assert dir_cache[str(tmp_path)] == {"other.aif"}
+
+    def test_missing_directory(self, tmp_path: Path) -> None:
+        """Test a file in a missing directory is reported missing and the directory cached as None."""
+        directory = str(tmp_path / "gone")
+        dir_cache: Dict[str, Any] = {}
+
+        assert not music_sorter._file_exists(f"{directory}/song.aif", dir_cache)
+        assert dir_cache[directory] is None
+
+    def test_unlistable_directory(self, tmp_path: Path) -> None:
+        """Test a path that cannot be listed is cached as empty and checked with stat()."""
+        not_a_directory = tmp_path / "file.aif"
+        not_a_directory.touch()
+        dir_cache: Dict[str, Any] = {}
+
+        assert not music_sorter._file_exists(f"{not_a_directory}/song.aif", dir_cache)
+        assert dir_cache[str(not_a_directory)] == set()
+
+    def test_listing_cached_per_directory(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test each directory is listed only once across lookups."""
+        for name in ("a.aif", "b.aif"):
+            (tmp_path / name).touch()
+        scanned: List[str] = []
+        real_scandir = os.scandir
+
+        def counting_scandir(path: str) -> Any:
+            scanned.append(path)
+            return real_scandir(path)
+
+        monkeypatch.setattr(music_sorter.os, "scandir", counting_scandir)
+        dir_cache: Dict[str, Any] = {}
+
+        for name in ("a.aif", "b.aif", "c.aif"):
+            music_sorter._file_exists(str(tmp_path / name), dir_cache)
+
+        assert scanned == [str(tmp_path)]
+
+
+class TestWritePlaylist:
+    """Test suite for playlist file contents written by create_playlists."""
+
+    def test_playlist_contents(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test duplicates are dropped, entries keep their paths through the shuffle and counts cover unique tracks."""
+        music_dir = tmp_path / "music"
+        music_dir.mkdir()
+        (music_dir / "one.aif").touch()
+        (music_dir / "dup.aif").touch()
+        output_dir = tmp_path / "playlists"
+
+        tracks = [
+            music_sorter.Track(name="One", artist="A", bpm=128, duration=200500, location=(music_dir / "one.aif").as_uri()),
+            music_sorter.Track(name="Two", artist="A", bpm=128, duration=90000, location=(music_dir / "two.aif").as_uri()),
+            music_sorter.Track(name="One", artist="A", bpm=130, duration=1000, location=(music_dir / "dup.aif").as_uri()),
+            music_sorter.Track(name="Three", artist="B", bpm=125, duration=60000),
+            music_sorter.Track(name="Four", artist="C", bpm=140, duration=30000, location="http://example.com/four"),
+        ]
+        sorter = music_sorter.MusicSorter("unused")
+        sorter.tracks = tracks
+
+        # Reverse instead of shuffling so entries are guaranteed to move
+        monkeypatch.setattr(music_sorter.random, "shuffle", lambda entries: entries.reverse())
+        sorter.create_playlists(output_dir)
+
+        header, entries = _read_playlist(output_dir / "BPM_Upbeat_121-140_BPM.m3u")
+        assert header == ["#EXTM3U", "#PLAYLIST:Upbeat (121-140 BPM)"]
+        assert entries == {
+            "#EXTINF:200,A - One": str(music_dir / "one.aif"),
+            "#EXTINF:90,A - Two": f"# MISSING: {music_dir / 'two.aif'}",
+            "#EXTINF:60,B - Three": "# NO LOCATION: B - Three",
+            "#EXTINF:30,C - Four": "http://example.com/four",
+        }
+
+        out = capsys.readouterr().out
+        assert "  - 2 tracks with valid paths" in out
+        assert "  - 2 tracks skipped (missing/invalid paths)" in out
+
+
+class TestSortCaching:
+    """Test suite for the cached BPM and genre groupings."""
+
+    def test_default_groupings_reused(self) -> None:
+        """Test default-range BPM and genre groupings are computed once."""
+        sorter = music_sorter.MusicSorter("unused")
+        sorter.tracks = [music_sorter.Track(name="One", artist="A", genre="Rock", bpm=128)]
+
+        assert sorter.sort_by_bpm() is sorter.sort_by_bpm()
+        assert sorter.sort_by_genre() is sorter.sort_by_genre()
+
+    def test_custom_ranges_not_cached(self) -> None:
+        """Test custom BPM ranges neither use nor replace the cached default grouping."""
+        sorter = music_sorter.MusicSorter("unused")
+        sorter.tracks = [music_sorter.Track(name="One", artist="A", bpm=128)]
+        default = sorter.sort_by_bpm()
+
+        custom = sorter.sort_by_bpm([(0, 999, "All")])
+
+        assert custom == {"All": sorter.tracks}
+        assert sorter.sort_by_bpm([(0, 999, "All")]) is not custom
+        assert sorter.sort_by_bpm() is default
+
+    def test_parse_library_clears_cache(self, tmp_path: Path) -> None:
+        """Test parsing a library discards groupings of the previous track list."""
+        sorter = music_sorter.MusicSorter(_write_library(tmp_path, _TRACKS_SECTION))
+        assert sorter.sort_by_bpm() == {}
+        assert sorter.sort_by_genre() == {}
+
+        sorter.parse_library()
+
+        assert [track.name for track in sorter.sort_by_bpm()["Upbeat (121-140 BPM)"]] == ["First Song"]
+        assert sorted(sorter.sort_by_genre()) == ["Rock", "Unknown"]
+
+
+class TestCreatePlaylists:
+    """Test suite for writing playlists on a thread pool."""
+
+    @staticmethod
+    def _sorter() -> Any:
+        """Build a sorter whose two genres sanitize to the same playlist file name."""
+        sorter = music_sorter.MusicSorter("unused")
+        sorter.tracks = [
+            music_sorter.Track(name=f"Song {i}", artist=f"Artist {i}", genre=genre, bpm=bpm)
+            for genre, bpm in (("Hip/Hop", 70), ("HipHop", 150))
+            for i in range(5)
+        ]
+        return sorter
+
+    def test_files_and_report_order(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Test results print in creation order and colliding genre names leave the later genre's file."""
+        sorter = self._sorter()
+        write_playlist = sorter._write_playlist
+
+        def slow_first_playlist(tracks: Any, filename: str, title: str, dir_cache: Any) -> Any:
+            # The first playlist finishes last, so completion order differs from creation order
+            if "Slow" in filename:
+                time.sleep(0.1)
+            return write_playlist(tracks, filename, title, dir_cache)
+
+        monkeypatch.setattr(sorter, "_write_playlist", slow_first_playlist)
+
+        sorter.create_playlists(str(tmp_path), max_workers=2)
+
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "BPM_Fast_141-160_BPM.m3u",
+            "BPM_Slow_0-80_BPM.m3u",
+            "Genre_HipHop.m3u",
+        ]
+        header, entries = _read_playlist(tmp_path / "Genre_HipHop.m3u")
+        assert header == ["#EXTM3U", "#PLAYLIST:Genre: HipHop"]
+        assert len(entries) == 5
+
+        created = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Created playlist:")]
+        assert created == [
+            f"Created playlist: {tmp_path}/BPM_Slow_0-80_BPM.m3u",
+            f"Created playlist: {tmp_path}/BPM_Fast_141-160_BPM.m3u",
+            f"Created playlist: {tmp_path}/Genre_HipHop.m3u",
+        ]
+
+    def test_write_error_propagates(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test an exception raised while writing one playlist reaches the caller."""
+        sorter = self._sorter()
+        write_playlist = sorter._write_playlist
+
+        def failing_fast_playlist(tracks: Any, filename: str, title: str, dir_cache: Any) -> Any:
+            if "Fast" in filename:
+                raise OSError("disk full")
+            return write_playlist(tracks, filename, title, dir_cache)
+
+        monkeypatch.setattr(sorter, "_write_playlist", failing_fast_playlist)
+
+        with pytest.raises(OSError, match="disk full"):
+            sorter.create_playlists(str(tmp_path), max_workers=2)